@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import TypeVar
+import sys
+from typing import Any, TypeVar
 
 import pydantic
 from pydantic import BaseModel
@@ -11,6 +12,15 @@ _ModelT = TypeVar('_ModelT', bound=BaseModel)
 
 PYDANTIC_V2 = pydantic.VERSION.startswith('2.')
 
+tomllib: Any
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
 
 def model_rebuild(model: type[BaseModel]) -> None:
     if PYDANTIC_V2:
@@ -24,3 +34,10 @@ def model_parse_json(model: type[_ModelT], obj: str | bytes) -> _ModelT:
         return model.model_validate_json(obj)
     else:
         return model.parse_raw(obj)  # type: ignore
+
+
+def model_dump_json(model: BaseModel) -> str:
+    if PYDANTIC_V2:
+        return model.model_dump_json(indent=2)
+    else:
+        return model.json(indent=2)  # type: ignore
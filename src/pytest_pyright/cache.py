@@ -0,0 +1,560 @@
+# -*- coding: utf-8 -*-
+
+import os
+import ast
+import sys
+import json
+import hashlib
+import sysconfig
+import tempfile
+import threading
+import importlib.util
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import pyright
+
+from ._compat import tomllib
+
+
+CONFIG_FILES = ('pyrightconfig.json', 'pyproject.toml')
+SOURCE_SUFFIXES = ('.py', '.pyi')
+IGNORED_DIRECTORIES = {'__pycache__', 'node_modules', 'site-packages'}
+
+
+class CacheBackend:
+    """Storage for raw pyright output, keyed by content-addressed keys."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Called once at the end of the test session"""
+
+
+class MemoryBackend(CacheBackend):
+    """In-process backend, useful as a stand-in for a shared backend in tests."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, bytes] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.entries[key] = value
+
+
+class DirectoryBackend(CacheBackend):
+    """Backend storing entries in a (possibly shared) directory.
+
+    Entries are written to a temporary file and then moved into place so that
+    concurrent readers never see a partially written entry. When `max_size` is
+    given, the least recently used entries are evicted at the end of the
+    session if the total size of the directory exceeds it, this avoids
+    scanning the directory on every write.
+    """
+
+    def __init__(self, root: Path, max_size: Optional[int] = None) -> None:
+        self.root = root
+        self.max_size = max_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        # mark the entry as recently used for eviction purposes
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp, str(path))
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def close(self) -> None:
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def evict(self, max_size: int) -> None:
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= max_size:
+                break
+
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _entries(self) -> Iterator[Path]:
+        if not self.root.exists():
+            return
+
+        for path in self.root.glob('*/*'):
+            if path.is_file() and not path.name.startswith('.tmp-'):
+                yield path
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+
+class PyrightCache:
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self.backend.set(key, value)
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+class KeyBuilder:
+    """Builds the keys identifying the analysis of a file.
+
+    Hashes of configuration files and dependencies are computed once per
+    instance, a new instance should be used for every test session.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._file_hashes: Dict[Path, str] = {}
+        self._imports: Dict[Path, List['_Import']] = {}
+        self._configs: Dict[Path, Tuple[Path, Dict[str, Any], str]] = {}
+        self._trees: Dict[Path, str] = {}
+        self._modules: Dict[str, Optional[str]] = {}
+
+    def key(self, path: Path) -> str:
+        """Return a key identifying the analysis of the given file.
+
+        The key is derived from the file contents, the file location relative
+        to the root directory, any pyright configuration files that may apply
+        to it, the Python version and platform, the pyright version and the
+        contents of the modules it imports.
+        """
+        path = path.absolute()
+        config_root, config, digest = self.config(path.parent)
+
+        python_version = config.get('pythonVersion') or '{}.{}'.format(
+            *sys.version_info[:2]
+        )
+        python_platform = config.get('pythonPlatform') or sys.platform
+
+        parts = [
+            pyright_version(),
+            str(python_version),
+            str(python_platform),
+            _relative(path, self.root),
+            self.file_hash(path),
+            digest,
+            self.dependencies_hash(path, config_root, config),
+        ]
+
+        key = hashlib.sha256()
+        for part in parts:
+            key.update(part.encode('utf-8'))
+            key.update(b'\0')
+        return key.hexdigest()
+
+    def config(self, directory: Path) -> Tuple[Path, Dict[str, Any], str]:
+        """Return the directory of the nearest pyright configuration file, its
+        settings and a hash of all configuration files that may apply.
+        """
+        cached = self._configs.get(directory)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.sha256()
+        config_root: Optional[Path] = None
+        config: Dict[str, Any] = {}
+
+        for parent in [directory, *directory.parents]:
+            for name in CONFIG_FILES:
+                file = parent / name
+                if not file.is_file():
+                    continue
+
+                digest.update(name.encode('utf-8'))
+                digest.update(file.read_bytes())
+                if config_root is None:
+                    settings = _load_config(file)
+                    if settings is not None:
+                        config_root = parent
+                        config = settings
+
+            if parent == self.root:
+                break
+
+        result = (config_root or self.root, config, digest.hexdigest())
+        self._configs[directory] = result
+        return result
+
+    def dependencies_hash(
+        self, path: Path, config_root: Path, config: Dict[str, Any]
+    ) -> str:
+        """Hash everything the given file may import.
+
+        Local modules, i.e. modules in the directory of the file, the project
+        root, `src/`, any configured `extraPaths` or the stubs directory, are
+        hashed transitively. Any other modules are resolved with the current
+        interpreter, standard library modules are ignored as they are covered
+        by the Python and pyright versions. If an import cannot be resolved,
+        every source file in the project is hashed instead.
+        """
+        search_paths = [config_root, config_root / 'src']
+        search_paths.extend(
+            config_root / extra for extra in config.get('extraPaths') or []
+        )
+        search_paths.append(config_root / str(config.get('stubPath') or 'typings'))
+
+        local: Set[Path] = set()
+        external: Set[str] = set()
+        unresolved = False
+
+        pending = [path]
+        while pending:
+            file = pending.pop()
+            if file in local:
+                continue
+            local.add(file)
+
+            for imported in self.imports(file):
+                if imported.level:
+                    files = _resolve_relative(file, imported)
+                else:
+                    files = _resolve_local([file.parent, *search_paths], imported.parts)
+
+                if files is not None:
+                    pending.extend(files)
+                    continue
+
+                if imported.level:
+                    unresolved = True
+                    continue
+
+                name = imported.parts[0]
+                module = self.module_hash(name)
+                if module is None:
+                    unresolved = True
+                else:
+                    external.add(name)
+
+        digest = hashlib.sha256()
+        for file in sorted(local, key=lambda f: _relative(f, self.root)):
+            digest.update(_relative(file, self.root).encode('utf-8'))
+            digest.update(self.file_hash(file).encode('utf-8'))
+
+        for name in sorted(external):
+            digest.update(name.encode('utf-8'))
+            digest.update((self.module_hash(name) or '').encode('utf-8'))
+
+        if unresolved:
+            digest.update(self.tree_hash(config_root).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def imports(self, path: Path) -> List['_Import']:
+        imports = self._imports.get(path)
+        if imports is None:
+            try:
+                content = path.read_text()
+            except (OSError, UnicodeDecodeError):
+                content = ''
+            imports = self._imports[path] = imported_modules(content)
+        return imports
+
+    def file_hash(self, path: Path) -> str:
+        digest = self._file_hashes.get(path)
+        if digest is None:
+            try:
+                digest = hash_bytes(path.read_bytes())
+            except OSError:
+                digest = ''
+            self._file_hashes[path] = digest
+        return digest
+
+    def module_hash(self, name: str) -> Optional[str]:
+        if name not in self._modules:
+            self._modules[name] = module_hash(name)
+        return self._modules[name]
+
+    def tree_hash(self, directory: Path) -> str:
+        digest = self._trees.get(directory)
+        if digest is None:
+            tree = hashlib.sha256()
+            for file in _source_files(directory):
+                tree.update(_relative(file, self.root).encode('utf-8'))
+                tree.update(self.file_hash(file).encode('utf-8'))
+            digest = self._trees[directory] = tree.hexdigest()
+        return digest
+
+
+class _Import(NamedTuple):
+    # the number of leading dots for relative imports
+    level: int
+    parts: Tuple[str, ...]
+
+
+def cache_key(path: Path, root: Path) -> str:
+    return KeyBuilder(root).key(path)
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def pyright_version() -> str:
+    forced = os.environ.get('PYRIGHT_PYTHON_FORCE_VERSION')
+    if forced:
+        return forced
+    return str(
+        getattr(pyright, '__pyright_version__', getattr(pyright, '__version__', ''))
+    )
+
+
+def imported_modules(content: str) -> List[_Import]:
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return []
+
+    imports: Set[_Import] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(_Import(0, tuple(a.name.split('.'))) for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            parts = tuple(node.module.split('.')) if node.module else ()
+            if parts:
+                imports.add(_Import(node.level, parts))
+
+            # `from a import b` may refer to the submodule `a.b`
+            if node.level:
+                imports.update(
+                    _Import(node.level, parts + (alias.name,))
+                    for alias in node.names
+                    if alias.name != '*'
+                )
+
+    return sorted(imports)
+
+
+def module_hash(name: str) -> Optional[str]:
+    """Hash the source of a top-level module that is not part of the project,
+    returns an empty string for standard library modules and `None` if the
+    module cannot be found.
+    """
+    if name in sys.builtin_module_names:
+        return ''
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+
+    if spec is None:
+        return None
+
+    if spec.origin is not None and os.path.isfile(spec.origin):
+        origin: Optional[Path] = Path(spec.origin)
+        if _is_stdlib(Path(spec.origin)):
+            return ''
+    else:
+        origin = None
+
+    if spec.submodule_search_locations:
+        files = sorted(
+            p
+            for location in spec.submodule_search_locations
+            for p in Path(location).rglob('*')
+            if p.suffix in SOURCE_SUFFIXES and p.is_file()
+        )
+    elif origin is not None:
+        files = [origin]
+    else:
+        # e.g. frozen modules
+        return ''
+
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file.name.encode('utf-8'))
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def _resolve_local(
+    search_paths: List[Path], parts: Tuple[str, ...]
+) -> Optional[List[Path]]:
+    """Find the files for a module that is part of the project, if the
+    top-level module is found but the full module path is not, the entire
+    top-level package is returned.
+    """
+    for directory in search_paths:
+        files = _resolve_module(directory, parts[:1])
+        if files is None:
+            continue
+
+        package = directory / parts[0]
+        if len(parts) > 1 and package.is_dir():
+            return _resolve_module(directory, parts) or list(_source_files(package))
+
+        if package.is_dir():
+            return list(_source_files(package))
+
+        return files
+
+    return None
+
+
+def _resolve_relative(path: Path, imported: _Import) -> Optional[List[Path]]:
+    base = path.parent
+    for _ in range(imported.level - 1):
+        base = base.parent
+
+    if not imported.parts:
+        return _resolve_module(base, ())
+
+    files = _resolve_module(base, imported.parts)
+    if files is None:
+        # `from .a import b` where `b` is not a submodule
+        return _resolve_module(base, imported.parts[:-1])
+    return files
+
+
+def _resolve_module(directory: Path, parts: Tuple[str, ...]) -> Optional[List[Path]]:
+    """Return the source files for the given module and its parent packages,
+    or `None` if the module does not exist in the given directory.
+    """
+    files: List[Path] = []
+    current = directory
+    for index, part in enumerate(parts):
+        current = current / part
+        is_last = index == len(parts) - 1
+        if current.is_dir():
+            files.extend(_package_init(current))
+            continue
+
+        if not is_last:
+            return None
+
+        modules = [
+            current.with_name(part + suffix)
+            for suffix in SOURCE_SUFFIXES
+            if current.with_name(part + suffix).is_file()
+        ]
+        if not modules:
+            return None
+        files.extend(modules)
+
+    if not parts:
+        files.extend(_package_init(directory))
+        if not files:
+            return None
+
+    return files
+
+
+def _package_init(directory: Path) -> List[Path]:
+    return [
+        directory / f'__init__{suffix}'
+        for suffix in SOURCE_SUFFIXES
+        if (directory / f'__init__{suffix}').is_file()
+    ]
+
+
+def _source_files(directory: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(directory):
+        # skip hidden directories, caches and virtual environments
+        dirnames[:] = sorted(
+            name
+            for name in dirnames
+            if not name.startswith('.')
+            and name not in IGNORED_DIRECTORIES
+            and not os.path.exists(os.path.join(dirpath, name, 'pyvenv.cfg'))
+        )
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1] in SOURCE_SUFFIXES:
+                yield Path(dirpath) / filename
+
+
+def _load_config(path: Path) -> Optional[Dict[str, Any]]:
+    """Return the pyright settings from the given config file, or `None` if
+    the file does not configure pyright.
+    """
+    if path.name == 'pyrightconfig.json':
+        try:
+            data = json.loads(path.read_text())
+        except ValueError:
+            # pyright supports comments in its config file
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    if tomllib is None:
+        return None
+
+    try:
+        data = tomllib.loads(path.read_text())
+    except ValueError:
+        return None
+
+    settings = data.get('tool', {}).get('pyright')
+    return settings if isinstance(settings, dict) else None
+
+
+def _is_stdlib(path: Path) -> bool:
+    stdlib = Path(sysconfig.get_paths()['stdlib'])
+    try:
+        relative = path.relative_to(stdlib)
+    except ValueError:
+        return False
+    return 'site-packages' not in relative.parts
+
+
+def _relative(path: Path, root: Path) -> str:
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
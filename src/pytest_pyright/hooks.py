@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from typing import Optional, TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from _pytest.config import Config
+    from .cache import CacheBackend
+    from .models import PyrightStats
+    from .plugin import PyrightTestItem
+
+
+@pytest.hookspec(firstresult=True)
+def pytest_pyright_cache_backend(config: 'Config') -> Optional['CacheBackend']:
+    """Return the backend used to store pyright results.
+
+    The default implementation returns a :class:`DirectoryBackend` when
+    ``--pyright-cache-dir`` is given. Returning ``None`` defers to the other
+    implementations, use ``--pyright-no-cache`` to disable caching entirely.
+    """
+
+
+def pytest_pyright_stats(item: 'PyrightTestItem', stats: 'PyrightStats') -> None:
+    """Called with the timing breakdown reported by pyright for a test file.
+
+    Only called when ``--pyright-stats`` or ``--pyright-profile`` is given.
+    """
@@ -10,6 +10,11 @@ from ._compat import model_rebuild
 
 TYPE_ERROR_RE = re.compile(r'.*# E: (?P<expected>.*)')
 REVEAL_TYPE_RE = re.compile(r'\s+reveal_type\(.*\)\s+# T: (?P<expected>.*)')
+STATS_TIMING_RE = re.compile(r'^(?P<name>[A-Za-z ]+):\s+(?P<seconds>[\d.]+)sec$')
+STATS_TOTAL_RE = re.compile(r'^Completed in (?P<seconds>[\d.]+)sec$')
+STATS_COUNT_RE = re.compile(
+    r'^Total files (?P<name>parsed and bound|checked): (?P<count>\d+)$'
+)
 
 
 class Expected(BaseModel):
@@ -50,6 +55,63 @@ class PyrightFile(BaseModel):
         return information.message
 
 
+class SnapshotEntry(BaseModel):
+    """The revealed types and the first line of the error messages that pyright
+    reported for a single file, keyed by their 1-based line number.
+    """
+
+    hash: str = ''
+    types: Dict[int, List[str]] = Field(default_factory=dict)
+    errors: Dict[int, List[str]] = Field(default_factory=dict)
+
+
+class PyrightSnapshot(BaseModel):
+    files: Dict[str, SnapshotEntry] = Field(default_factory=dict)
+
+
+class PyrightStats(BaseModel):
+    """Timing stats reported by `pyright --stats`, in seconds.
+
+    `total` is the overall analysis time, the `timings` breakdown overlaps
+    (e.g. tokenizing is timed as part of parsing) so it does not add up to it.
+    """
+
+    files_parsed: int = 0
+    files_checked: int = 0
+    total: float = 0
+    timings: Dict[str, float] = Field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, output: str) -> 'PyrightStats':
+        stats = cls()
+        for line in output.splitlines():
+            line = line.strip()
+
+            count = STATS_COUNT_RE.match(line)
+            if count is not None:
+                if count.group('name') == 'checked':
+                    stats.files_checked = int(count.group('count'))
+                else:
+                    stats.files_parsed = int(count.group('count'))
+                continue
+
+            total = STATS_TOTAL_RE.match(line)
+            if total is not None:
+                stats.total = float(total.group('seconds'))
+                continue
+
+            timing = STATS_TIMING_RE.match(line)
+            if timing is not None:
+                name = timing.group('name').strip().lower().replace(' ', '_')
+                stats.timings[name] = float(timing.group('seconds'))
+
+        return stats
+
+
+class PyrightProfile(BaseModel):
+    items: Dict[str, PyrightStats] = Field(default_factory=dict)
+
+
 class PyrightResult(BaseModel):
     time: int
     version: str
@@ -2,11 +2,22 @@
 
 import os
 import re
-import sys
+import shutil
+import tempfile
 import subprocess
 from pathlib import Path
-from functools import lru_cache
-from typing import Optional, List, Union, Iterator, Any, cast, TYPE_CHECKING
+from functools import partial
+from typing import (
+    Optional,
+    List,
+    Dict,
+    Tuple,
+    Union,
+    Iterator,
+    Any,
+    cast,
+    TYPE_CHECKING,
+)
 
 import pytest
 import pyright
@@ -17,12 +28,28 @@ from _pytest._io import TerminalWriter
 from _pytest._code import ExceptionInfo
 from _pytest._code.code import TerminalRepr
 
-from .models import PyrightResult, PyrightFile
-from ._compat import model_parse_json
+from . import hooks
+from .cache import CacheBackend, DirectoryBackend, KeyBuilder, PyrightCache
+from .prefetch import Prefetcher
+from .models import (
+    PyrightResult,
+    PyrightFile,
+    PyrightDiagnostic,
+    PyrightProfile,
+    PyrightStats,
+    SnapshotEntry,
+)
+from .snapshot import SnapshotManager
+from .snippets import Snippet, extract_docstrings, extract_markdown
+from ._compat import model_dump_json, model_parse_json
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
     from _pytest._code.code import _TracebackStyle
+    from _pytest.config import PytestPluginManager
     from _pytest.config.argparsing import Parser
+    from _pytest.main import Session
+    from _pytest.terminal import TerminalReporter
 
 
 # TODO: cleanup code
@@ -34,15 +61,34 @@ if TYPE_CHECKING:
 
 PYRIGHT_TYPE_RE = re.compile(r'Type of "(.*)" is "(?P<type>.*)"')
 
+cache_stash_key = pytest.StashKey[PyrightCache]()
+key_builder_stash_key = pytest.StashKey[KeyBuilder]()
+prefetcher_stash_key = pytest.StashKey[Prefetcher]()
+snippet_batch_stash_key = pytest.StashKey['SnippetBatch']()
+snapshot_stash_key = pytest.StashKey[SnapshotManager]()
+profile_stash_key = pytest.StashKey[PyrightProfile]()
+
+# maximum number of files passed to a single pyright invocation
+SNIPPET_BATCH_SIZE = 256
+
 
 def relative_path(path: Path) -> Path:
     return path.relative_to(Path.cwd())
 
 
 def is_typesafety_file(parent: Node, path: Path) -> bool:
+    return is_in_directory(path, parent.config.option.pyright_dir)
+
+
+def is_snippets_file(parent: Node, path: Path) -> bool:
+    directory = parent.config.option.pyright_docs_dir
+    return directory is not None and is_in_directory(path, directory)
+
+
+def is_in_directory(path: Path, directory: str) -> bool:
     # TODO: don't know how good this check is
     relative = relative_path(path)
-    return relative.as_posix().startswith(parent.config.option.pyright_dir)
+    return relative.as_posix().startswith(directory)
 
 
 def maybe_decode(data: Union[bytes, str]) -> str:
@@ -53,9 +99,13 @@ def maybe_decode(data: Union[bytes, str]) -> str:
     return data
 
 
-def pytest_collect_file(file_path: Path, parent: Node) -> Optional['PyrightTestFile']:
+def pytest_collect_file(
+    file_path: Path, parent: Node
+) -> Union['PyrightTestFile', 'PyrightSnippetsFile', None]:
     if file_path.suffix == '.py' and is_typesafety_file(parent, file_path):
         return PyrightTestFile.from_parent(parent, path=file_path)
+    if file_path.suffix in {'.py', '.md'} and is_snippets_file(parent, file_path):
+        return PyrightSnippetsFile.from_parent(parent, path=file_path)
     return None
 
 
@@ -67,6 +117,382 @@ def pytest_addoption(parser: 'Parser'):
         default='typesafety',
         help='Specify the root directory to use to search for pyright tests.',
     )
+    group.addoption(
+        '--pyright-cache-dir',
+        action='store',
+        default=None,
+        help='Cache pyright results in the given directory, may be shared between machines.',
+    )
+    group.addoption(
+        '--pyright-cache-max-size',
+        action='store',
+        type=int,
+        default=None,
+        help='Maximum size of the pyright cache directory in bytes.',
+    )
+    group.addoption(
+        '--pyright-no-cache',
+        action='store_true',
+        default=False,
+        help='Disable caching of pyright results, including custom backends.',
+    )
+    group.addoption(
+        '--pyright-prefetch',
+        action='store',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Analyse upcoming pyright tests in N background threads.',
+    )
+    group.addoption(
+        '--pyright-docs-dir',
+        action='store',
+        default=None,
+        help=(
+            'Type check the code blocks in Markdown files and the doctest '
+            'examples in Python docstrings in the given directory.'
+        ),
+    )
+    group.addoption(
+        '--pyright-snapshot-file',
+        action='store',
+        default='.pyright-snapshot.json',
+        help=(
+            'Path to the revealed type snapshot file, relative to the rootdir. '
+            'Snapshots are used if the file exists.'
+        ),
+    )
+    group.addoption(
+        '--pyright-update-snapshots',
+        action='store_true',
+        default=False,
+        help='Rewrite the revealed type snapshot file with the current results.',
+    )
+    group.addoption(
+        '--pyright-stats',
+        action='store_true',
+        default=False,
+        help='Collect the pyright timing stats for every test file.',
+    )
+    group.addoption(
+        '--pyright-profile',
+        action='store',
+        default=None,
+        help='Write the pyright timing stats for every test file to the given JSON file.',
+    )
+
+
+def pytest_addhooks(pluginmanager: 'PytestPluginManager') -> None:
+    pluginmanager.add_hookspecs(hooks)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_pyright_cache_backend(config: Config) -> Optional[CacheBackend]:
+    cache_dir = config.option.pyright_cache_dir
+    if cache_dir is None:
+        return None
+    return DirectoryBackend(
+        Path(cache_dir).absolute(), max_size=config.option.pyright_cache_max_size
+    )
+
+
+def pytest_configure(config: Config) -> None:
+    config.stash[key_builder_stash_key] = KeyBuilder(config.rootpath)
+
+    if not config.option.pyright_no_cache:
+        backend = config.hook.pytest_pyright_cache_backend(config=config)
+        if backend is not None:
+            config.stash[cache_stash_key] = PyrightCache(backend)
+
+    if config.option.pyright_stats or config.option.pyright_profile:
+        config.stash[profile_stash_key] = PyrightProfile()
+
+    snapshot_file = config.rootpath / config.option.pyright_snapshot_file
+    update = config.option.pyright_update_snapshots
+    if update or snapshot_file.exists():
+        config.stash[snapshot_stash_key] = SnapshotManager(
+            snapshot_file, root=config.rootpath, update=update
+        )
+
+
+def pytest_collection_finish(session: 'Session') -> None:
+    config = session.config
+    snippets = [item for item in session.items if isinstance(item, PyrightSnippetItem)]
+    if snippets:
+        config.stash[snippet_batch_stash_key] = SnippetBatch(config, snippets)
+
+    workers = config.option.pyright_prefetch
+    if workers <= 0 or config.option.collectonly:
+        return
+
+    paths = [
+        item.path
+        for item in session.items
+        if isinstance(item, PyrightTestItem)
+        and not isinstance(item, PyrightSnippetItem)
+        and item.get_fresh_snapshot() is None
+    ]
+    if not paths:
+        return
+
+    prefetcher = Prefetcher(workers=workers)
+    for path in paths:
+        prefetcher.submit(('result', path), partial(run_pyright, config, path))
+
+    config.stash[prefetcher_stash_key] = prefetcher
+
+
+def pytest_sessionfinish(session: 'Session') -> None:
+    prefetcher = session.config.stash.get(prefetcher_stash_key, None)
+    if prefetcher is not None:
+        prefetcher.shutdown()
+        del session.config.stash[prefetcher_stash_key]
+
+    batch = session.config.stash.get(snippet_batch_stash_key, None)
+    if batch is not None:
+        batch.cleanup()
+        del session.config.stash[snippet_batch_stash_key]
+
+    snapshots = session.config.stash.get(snapshot_stash_key, None)
+    if snapshots is not None and snapshots.update:
+        snapshots.write()
+
+    cache = session.config.stash.get(cache_stash_key, None)
+    if cache is not None:
+        cache.close()
+
+    profile = session.config.stash.get(profile_stash_key, None)
+    if profile is not None and session.config.option.pyright_profile:
+        path = Path(session.config.option.pyright_profile)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(model_dump_json(profile) + '\n')
+
+
+def pytest_terminal_summary(
+    terminalreporter: 'TerminalReporter', exitstatus: int, config: Config
+) -> None:
+    profile = config.stash.get(profile_stash_key, None)
+    if profile is not None and profile.items:
+        terminalreporter.write_sep('-', 'slowest pyright files')
+        slowest = sorted(profile.items.items(), key=lambda i: i[1].total, reverse=True)
+        for nodeid, stats in slowest[:10]:
+            timings = ', '.join(
+                f'{name} {seconds:.2f}s'
+                for name, seconds in stats.timings.items()
+                if seconds
+            )
+            terminalreporter.write_line(
+                f'{stats.total:.2f}s {nodeid} (breakdown: {timings})'
+            )
+
+    snapshots = config.stash.get(snapshot_stash_key, None)
+    if snapshots is not None and snapshots.update:
+        terminalreporter.write_sep('-', 'pyright snapshots')
+        terminalreporter.write_line(
+            f'{snapshots.recorded} snapshots written to {snapshots.path}'
+        )
+
+    cache = config.stash.get(cache_stash_key, None)
+    if cache is None:
+        return
+
+    terminalreporter.write_sep('-', 'pyright cache')
+    terminalreporter.write_line(f'{cache.hits} hits, {cache.misses} misses')
+
+
+def run_pyright(
+    config: Config, path: Path
+) -> Tuple[PyrightResult, Optional[PyrightStats]]:
+    """Analyse the given file, stats are only collected when they are enabled
+    and the file is actually analysed, i.e. not for cached results.
+    """
+    cache = config.stash.get(cache_stash_key, None)
+    if cache is None:
+        result = parse_result(execute_pyright(path.parent, path), path)
+        return result, maybe_run_pyright_stats(config, path)
+
+    key = config.stash[key_builder_stash_key].key(path)
+    cached = cache.get(key)
+    if cached is not None:
+        result = model_parse_json(PyrightResult, cached)
+
+        # cached results may have been created in a different location
+        absolute = str(path.absolute())
+        for diagnostic in result.diagnostics:
+            diagnostic.file = absolute
+
+        return result, None
+
+    stdout = execute_pyright(path.parent, path)
+    result = parse_result(stdout, path)
+    cache.set(key, stdout)
+    return result, maybe_run_pyright_stats(config, path)
+
+
+def execute_pyright(project: Path, *paths: Path) -> bytes:
+    process = pyright.run(
+        f'--project={project}',
+        '--outputjson',
+        *[str(path) for path in paths],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    # https://github.com/microsoft/pyright/blob/main/docs/command-line.md#pyright-exit-codes
+    if process.returncode not in {0, 1}:
+        raise unknown_error('An unknown error ocurred while running pyright', process)
+
+    return cast(bytes, process.stdout)
+
+
+def maybe_run_pyright_stats(config: Config, path: Path) -> Optional[PyrightStats]:
+    if profile_stash_key not in config.stash:
+        return None
+    return run_pyright_stats(path)
+
+
+def run_pyright_stats(path: Path) -> PyrightStats:
+    # pyright does not support combining --stats with --outputjson
+    process = pyright.run(
+        f'--project={path.parent}',
+        '--stats',
+        str(path),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if process.returncode not in {0, 1}:
+        raise unknown_error(
+            'An unknown error ocurred while collecting pyright stats', process
+        )
+
+    return PyrightStats.parse(maybe_decode(process.stdout))
+
+
+def unknown_error(
+    message: str, process: 'subprocess.CompletedProcess[Any]'
+) -> 'PyrightError':
+    # pyright may be run in a background thread so the output is included in
+    # the error instead of being printed to whichever test is being captured
+    lines = [f'{message} (exit code {process.returncode}):']
+    for name, output in (('stdout', process.stdout), ('stderr', process.stderr)):
+        output = maybe_decode(output or b'').strip()
+        if output:
+            lines.append(f'----- pyright {name} -----')
+            lines.extend(output.splitlines())
+    return PyrightError('\n'.join(lines))
+
+
+def parse_result(stdout: bytes, path: Path) -> PyrightResult:
+    result = model_parse_json(PyrightResult, stdout)
+
+    absolute = os.path.normcase(str(path.absolute()))
+    for diagnostic in result.diagnostics:
+        if os.path.normcase(diagnostic.file) != absolute:
+            raise PyrightError(
+                f'Received diagnostic for unknown file: {diagnostic.file}; Expected {absolute}'
+            )
+
+    return result
+
+
+def summarize_diagnostics(
+    diagnostics: List[PyrightDiagnostic],
+) -> Tuple[SnapshotEntry, List['PyrightError']]:
+    entry = SnapshotEntry()
+    errors: List[PyrightError] = []
+
+    for diagnostic in diagnostics:
+        # pyright json diagnostic line numbers are 0-based
+        line = diagnostic.range.start.line + 1
+
+        if diagnostic.severity == 'error':
+            # we only care about the first line
+            actual, *_ = diagnostic.message.split('\n')
+            entry.errors.setdefault(line, []).append(actual)
+        elif diagnostic.severity == 'information':
+            match = PYRIGHT_TYPE_RE.match(diagnostic.message)
+            if match is None:
+                errors.append(
+                    PyrightError(
+                        f'Could not extract type from message: "{diagnostic.message}"',
+                        lineno=line,
+                    )
+                )
+                continue
+
+            entry.types.setdefault(line, []).append(match.group('type'))
+        else:
+            errors.append(
+                PyrightError(
+                    f'Unknown diagnostic type: {diagnostic.severity}', lineno=line
+                )
+            )
+
+    return entry, errors
+
+
+class SnippetBatch:
+    """Type checks the snippets for all the given items in as few pyright
+    invocations as possible, the first time any of the results are requested.
+    """
+
+    def __init__(self, config: Config, items: List['PyrightSnippetItem']) -> None:
+        self.config = config
+        self.items = items
+        self.indexes = {item.nodeid: index for index, item in enumerate(items)}
+        self.directory: Optional[Path] = None
+        self.diagnostics: Optional[Dict[str, List[PyrightDiagnostic]]] = None
+        self.error: Optional[PyrightError] = None
+
+    def get_diagnostics(self, item: 'PyrightSnippetItem') -> List[PyrightDiagnostic]:
+        if self.error is not None:
+            raise self.error
+
+        if self.diagnostics is None:
+            try:
+                self.diagnostics = self.run()
+            except PyrightError as exc:
+                self.error = exc
+                raise
+
+        return self.diagnostics.get(self.key(self.path(item)), [])
+
+    def run(self) -> Dict[str, List[PyrightDiagnostic]]:
+        self.directory = Path(tempfile.mkdtemp(prefix='pytest-pyright-')).resolve()
+        paths: List[Path] = []
+        for item in self.items:
+            path = self.path(item)
+            path.write_text(item.content)
+            paths.append(path)
+
+        expected = {self.key(path) for path in paths}
+        diagnostics: Dict[str, List[PyrightDiagnostic]] = {}
+
+        for start in range(0, len(paths), SNIPPET_BATCH_SIZE):
+            end = start + SNIPPET_BATCH_SIZE
+            stdout = execute_pyright(self.config.rootpath, *paths[start:end])
+            result = model_parse_json(PyrightResult, stdout)
+            for diagnostic in result.diagnostics:
+                key = self.key(Path(diagnostic.file))
+                if key not in expected:
+                    raise PyrightError(
+                        f'Received diagnostic for unknown file: {diagnostic.file}'
+                    )
+                diagnostics.setdefault(key, []).append(diagnostic)
+
+        return diagnostics
+
+    def path(self, item: 'PyrightSnippetItem') -> Path:
+        assert self.directory is not None
+        return self.directory / f'snippet_{self.indexes[item.nodeid]}.py'
+
+    def key(self, path: Path) -> str:
+        return os.path.normcase(str(path.absolute()))
+
+    def cleanup(self) -> None:
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
 
 
 class PyrightTerminalRepr(TerminalRepr):
@@ -80,7 +506,8 @@ class PyrightTerminalRepr(TerminalRepr):
 
     @classmethod
     def from_error(cls, error: 'PyrightError') -> 'PyrightTerminalRepr':
-        return cls(lines=[f'E |  {error.message}'])
+        first, *rest = error.message.splitlines() or ['']
+        return cls(lines=[f'E |  {first}', *rest])
 
     @classmethod
     def from_errors(cls, exc: 'PyrightErrors') -> 'PyrightTerminalRepr':
@@ -102,10 +529,11 @@ class PyrightTerminalRepr(TerminalRepr):
             return len(str(num))
 
         content_lines = exc.item.content.splitlines()
-        max_padding = num_digits(len(content_lines)) + 1
+        linenos = exc.linenos or list(range(1, len(content_lines) + 1))
+        max_padding = num_digits(max(linenos, default=0)) + 1
         lines = [
             f'{lineno}{get_separator(lineno)} {content}'
-            for lineno, content in enumerate(content_lines, start=1)
+            for lineno, content in zip(linenos, content_lines)
         ]
 
         separator = '|'.rjust(max_padding)
@@ -128,61 +556,53 @@ class PyrightError(AssertionError):
 
 
 class PyrightErrors(Exception):
-    def __init__(self, errors: List[PyrightError], item: 'PyrightTestItem') -> None:
+    def __init__(
+        self,
+        errors: List[PyrightError],
+        item: 'PyrightTestItem',
+        linenos: Optional[List[int]] = None,
+    ) -> None:
         self.item = item
         self.errors = errors
+        self.linenos = linenos
 
 
 class PyrightTestItem(pytest.Item):
     def __init__(
         self,
         name: str,
-        parent: Optional['PyrightTestFile'] = None,
+        parent: Optional[pytest.File] = None,
         config: Optional[Config] = None,
         *,
         path: Path,
     ) -> None:
         super().__init__(name, parent, config)
         self.path = path
+        self._content: Optional[str] = None
         self.starting_lineno = 1
+        self.linenos: Optional[List[int]] = None
+        self.stats: Optional[PyrightStats] = None
 
     def runtest(self) -> None:
+        entry = self.get_fresh_snapshot()
         file = PyrightFile.parse(self.content)
-        process = pyright.run(
-            f'--project={self.path.parent}',
-            '--outputjson',
-            str(self.path),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-
-        # https://github.com/microsoft/pyright/blob/main/docs/command-line.md#pyright-exit-codes
-        if process.returncode not in {0, 1}:
-            print(maybe_decode(process.stderr), file=sys.stderr)
-            print(maybe_decode(process.stdout))
-            raise PyrightError(
-                'An unknown error ocurred while running pyright, '
-                'see the captured output for more details.'
-            )
-
-        result = model_parse_json(PyrightResult, process.stdout)
+        snapshots = self.get_snapshots()
+        snapshot = snapshots.get(self.path) if snapshots is not None else None
 
-        absolute = os.path.normcase(str(self.path.absolute()))
         errors: List[PyrightError] = []
-
-        for diagnostic in result.diagnostics:
-            if os.path.normcase(diagnostic.file) != absolute:
-                raise PyrightError(
-                    f'Received diagnostic for unknown file: {diagnostic.file}; Expected {absolute}'
-                )
-
-            # pyright json diagnostic line numbers are 0-based
-            line = diagnostic.range.start.line + 1
-
-            if diagnostic.severity == 'error':
-                # we only care about the first line
-                actual, *_ = diagnostic.message.split('\n')
-
+        if entry is None:
+            entry, errors = summarize_diagnostics(self.get_diagnostics())
+            if snapshots is not None and snapshots.update:
+                if errors:
+                    # these errors are not part of the snapshot, so the file
+                    # must always be analysed again
+                    snapshots.discard(self.path)
+                else:
+                    entry.hash = self.config.stash[key_builder_stash_key].key(self.path)
+                    snapshots.record(self.path, entry)
+
+        for line, messages in entry.errors.items():
+            for actual in messages:
                 try:
                     expected = file.get_error(line)
                 except KeyError:
@@ -200,29 +620,27 @@ class PyrightTestItem(pytest.Item):
                         )
                     )
                     continue
-            elif diagnostic.severity == 'information':
-                match = PYRIGHT_TYPE_RE.match(diagnostic.message)
-                if match is None:
-                    errors.append(
-                        PyrightError(
-                            f'Could not extract type from message: "{diagnostic.message}"',
-                            lineno=line,
-                        )
-                    )
-                    continue
-
-                actual = match.group('type')
 
+        for line, types in entry.types.items():
+            recorded = snapshot.types.get(line, []) if snapshot is not None else []
+            for index, actual in enumerate(types):
                 try:
                     expected = file.get_information(line)
                 except KeyError:
-                    errors.append(
-                        PyrightError(
-                            f'Missing type comment, revealed type: {actual}',
-                            lineno=line,
+                    if snapshots is not None and snapshots.update:
+                        # the revealed type has just been recorded
+                        continue
+
+                    if index >= len(recorded):
+                        errors.append(
+                            PyrightError(
+                                f'Missing type comment, revealed type: {actual}',
+                                lineno=line,
+                            )
                         )
-                    )
-                    continue
+                        continue
+
+                    expected = recorded[index]
 
                 if expected != actual:
                     errors.append(
@@ -232,19 +650,62 @@ class PyrightTestItem(pytest.Item):
                         )
                     )
                     continue
-            else:
-                errors.append(
-                    PyrightError(
-                        f'Unknown diagnostic type: {diagnostic.severity}', lineno=line
-                    )
-                )
 
         for line, error in file.errors.items():
             if not error.accessed:
                 errors.append(PyrightError('Did not raise an error', lineno=line))
 
         if errors:
-            raise PyrightErrors(errors, item=self)
+            raise PyrightErrors(errors, item=self, linenos=self.linenos)
+
+    def record_stats(self, stats: PyrightStats) -> None:
+        self.stats = stats
+        self.config.stash[profile_stash_key].items[self.nodeid] = stats
+        self.config.hook.pytest_pyright_stats(item=self, stats=stats)
+
+    def get_snapshots(self) -> Optional[SnapshotManager]:
+        return self.config.stash.get(snapshot_stash_key, None)
+
+    def get_fresh_snapshot(self) -> Optional[SnapshotEntry]:
+        """Return the snapshot entry for this file if it can be used instead of
+        running pyright, i.e. the file and its dependencies have not changed.
+        """
+        snapshots = self.get_snapshots()
+        if snapshots is None or snapshots.update:
+            return None
+
+        entry = snapshots.get(self.path)
+        if entry is None:
+            return None
+
+        if entry.hash != self.config.stash[key_builder_stash_key].key(self.path):
+            return None
+
+        return entry
+
+    def get_diagnostics(self) -> List[PyrightDiagnostic]:
+        result, stats = self.get_result()
+        if stats is not None:
+            self.record_stats(stats)
+        return result.diagnostics
+
+    def get_result(self) -> Tuple[PyrightResult, Optional[PyrightStats]]:
+        future = self.get_prefetched('result')
+        if future is not None:
+            return cast(Tuple[PyrightResult, Optional[PyrightStats]], future.result())
+
+        return run_pyright(self.config, self.path)
+
+    def get_prefetched(self, kind: str) -> Optional['Future[Any]']:
+        prefetcher = self.config.stash.get(prefetcher_stash_key, None)
+        if prefetcher is None:
+            return None
+
+        future = prefetcher.pop((kind, self.path))
+        if future is None or future.cancelled():
+            return None
+
+        return future
 
     def repr_failure(
         self,
@@ -259,14 +720,14 @@ class PyrightTestItem(pytest.Item):
 
         return super().repr_failure(excinfo, style=style)
 
-    def reportinfo(self):
+    def reportinfo(self) -> Tuple[Any, int, str]:
         return self.fspath, 0, f'pyright: {self.name}'
 
-    # TODO: does this cache get deleted when the item is destroyed?
     @property
-    @lru_cache(maxsize=None)
     def content(self) -> str:
-        return self.path.read_text()
+        if self._content is None:
+            self._content = self.path.read_text()
+        return self._content
 
 
 class PyrightTestFile(pytest.File):
@@ -282,3 +743,70 @@ class PyrightTestFile(pytest.File):
     def collect(self) -> Iterator[PyrightTestItem]:
         path = Path(self.fspath)
         yield PyrightTestItem.from_parent(parent=self, name=path.name, path=path)
+
+
+class PyrightSnippetItem(PyrightTestItem):
+    """Type checks a snippet extracted from a documentation file, line numbers
+    are reported relative to the documentation file.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional['PyrightSnippetsFile'] = None,
+        config: Optional[Config] = None,
+        *,
+        path: Path,
+        snippet: Snippet,
+    ) -> None:
+        super().__init__(name, parent, config, path=path)
+        self.snippet = snippet
+        self.starting_lineno = snippet.linenos[0]
+        self.linenos = snippet.linenos
+
+    def get_diagnostics(self) -> List[PyrightDiagnostic]:
+        # snippets are type checked together so there are no per item stats
+        batch = self.config.stash.get(snippet_batch_stash_key, None)
+        if batch is None:
+            # the item was not part of the collected session items
+            batch = SnippetBatch(self.config, [self])
+            self.config.stash[snippet_batch_stash_key] = batch
+        return batch.get_diagnostics(self)
+
+    def get_snapshots(self) -> Optional[SnapshotManager]:
+        # snapshots are only supported for regular pyright test files
+        return None
+
+    def reportinfo(self) -> Tuple[Any, int, str]:
+        return self.fspath, self.starting_lineno - 1, f'pyright: {self.name}'
+
+    @property
+    def content(self) -> str:
+        return self.snippet.content
+
+
+class PyrightSnippetsFile(pytest.File):
+    @classmethod
+    def from_parent(
+        cls, *args: Any, **kwargs: Any
+    ) -> 'PyrightSnippetsFile':  # pyright: ignore[reportIncompatibleMethodOverride]
+        return cast(
+            PyrightSnippetsFile,
+            super().from_parent(*args, **kwargs),
+        )
+
+    def collect(self) -> Iterator[PyrightSnippetItem]:
+        path = Path(self.fspath)
+        content = path.read_text()
+        if path.suffix == '.md':
+            snippets = extract_markdown(content)
+        else:
+            snippets = extract_docstrings(content)
+
+        for snippet in snippets:
+            yield PyrightSnippetItem.from_parent(
+                parent=self,
+                name=f'line-{snippet.linenos[0]}',
+                path=path,
+                snippet=snippet,
+            )
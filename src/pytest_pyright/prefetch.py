@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class Prefetcher:
+    """Run work for upcoming test items in background threads so that results
+    are ready by the time the corresponding test item is run.
+
+    Work is started in the order that it is submitted in, with `workers`
+    threads this means that at most `workers` analyses are running at once.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='pytest-pyright'
+        )
+        self.futures: Dict[Hashable, 'Future[Any]'] = {}
+
+    def submit(self, key: Hashable, func: Callable[[], Any]) -> None:
+        if key not in self.futures:
+            self.futures[key] = self.executor.submit(func)
+
+    def pop(self, key: Hashable) -> Optional['Future[Any]']:
+        return self.futures.pop(key, None)
+
+    def shutdown(self) -> None:
+        for future in self.futures.values():
+            future.cancel()
+
+        self.futures.clear()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from .models import PyrightSnapshot, SnapshotEntry
+from ._compat import model_dump_json, model_parse_json
+
+
+class SnapshotManager:
+    """Loads revealed type snapshots and, when updating, rewrites the snapshot
+    file with the recorded entries at the end of the session.
+    """
+
+    def __init__(self, path: Path, root: Path, update: bool) -> None:
+        self.path = path
+        self.root = root
+        self.update = update
+        self.recorded = 0
+
+        if path.exists():
+            self.snapshot = model_parse_json(PyrightSnapshot, path.read_bytes())
+        else:
+            self.snapshot = PyrightSnapshot()
+
+    def name(self, path: Path) -> str:
+        return path.absolute().relative_to(self.root).as_posix()
+
+    def get(self, path: Path) -> Optional[SnapshotEntry]:
+        return self.snapshot.files.get(self.name(path))
+
+    def record(self, path: Path, entry: SnapshotEntry) -> None:
+        self.snapshot.files[self.name(path)] = entry
+        self.recorded += 1
+
+    def discard(self, path: Path) -> None:
+        self.snapshot.files.pop(self.name(path), None)
+
+    def write(self) -> None:
+        files = {
+            name: self.snapshot.files[name]
+            for name in sorted(self.snapshot.files)
+            if (self.root / name).exists()
+        }
+        snapshot = PyrightSnapshot(files=files)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(model_dump_json(snapshot))
+            f.write('\n')
+        os.replace(tmp, str(self.path))
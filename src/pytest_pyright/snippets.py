@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import re
+import ast
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+
+FENCE_RE = re.compile(r'^(?P<indent>\s*)(?P<fence>`{3,}|~{3,})\s*(?P<info>[^`]*)$')
+PYTHON_LANGUAGES = {'py', 'python', 'python3'}
+DOCTEST_LANGUAGES = {'pycon', 'doctest'}
+
+
+class Snippet(BaseModel):
+    """A piece of code extracted from a documentation file.
+
+    `linenos` maps each line in the snippet to its line in the original file.
+    """
+
+    lines: List[str]
+    linenos: List[int]
+
+    @property
+    def content(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+def extract_markdown(content: str) -> List[Snippet]:
+    """Extract fenced Python code blocks from a Markdown document"""
+    snippets: List[Snippet] = []
+    lines = content.splitlines()
+    index = 0
+
+    while index < len(lines):
+        opening = FENCE_RE.match(lines[index])
+        index += 1
+        if opening is None:
+            continue
+
+        fence = opening.group('fence')
+        indent = len(opening.group('indent'))
+        info = opening.group('info').split()
+        language = info[0].lower() if info else ''
+
+        start = index
+        while index < len(lines) and not _is_closing_fence(lines[index], fence):
+            index += 1
+
+        block = [line[indent:] for line in lines[start:index]]
+        index += 1
+
+        # mkdocs snippet includes are type checked at their source
+        if any(line.lstrip().startswith('--8<--') for line in block):
+            continue
+
+        # line numbers are 1-based
+        if language in PYTHON_LANGUAGES:
+            if block:
+                snippets.append(
+                    Snippet(
+                        lines=block,
+                        linenos=list(range(start + 1, start + len(block) + 1)),
+                    )
+                )
+        elif language in DOCTEST_LANGUAGES:
+            snippet = extract_doctest(block, start=start + 1)
+            if snippet is not None:
+                snippets.append(snippet)
+
+    return snippets
+
+
+def extract_docstrings(content: str) -> List[Snippet]:
+    """Extract doctest examples from the docstrings in a Python module,
+    every docstring is treated as a separate snippet.
+    """
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return []
+
+    snippets: List[Snippet] = []
+    for node in ast.walk(tree):
+        if not isinstance(
+            node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+        ):
+            continue
+
+        if not node.body:
+            continue
+
+        docstring = _get_docstring(node.body[0])
+        if docstring is None:
+            continue
+
+        value, start = docstring
+        snippet = extract_doctest(value.splitlines(), start=start)
+        if snippet is not None:
+            snippets.append(snippet)
+
+    return sorted(snippets, key=lambda s: s.linenos[0])
+
+
+def extract_doctest(lines: Sequence[str], start: int) -> Optional[Snippet]:
+    """Extract the source of all the examples in a doctest session,
+    `start` is the line number of the first line.
+    """
+    code: List[str] = []
+    linenos: List[int] = []
+    in_example = False
+
+    for lineno, line in enumerate(lines, start=start):
+        stripped = line.lstrip()
+        if stripped.startswith('>>> ') or stripped == '>>>':
+            in_example = True
+        elif in_example and (stripped.startswith('... ') or stripped == '...'):
+            pass
+        else:
+            in_example = False
+            continue
+
+        code.append(stripped[4:])
+        linenos.append(lineno)
+
+    if not code:
+        return None
+
+    return Snippet(lines=code, linenos=linenos)
+
+
+def _get_docstring(node: ast.stmt) -> Optional[Tuple[str, int]]:
+    """Return the docstring value and the line number that it starts on"""
+    if not isinstance(node, ast.Expr):
+        return None
+
+    value = node.value
+    if sys.version_info < (3, 8):
+        if isinstance(value, ast.Str):
+            # the line number of a string is the line that it ends on
+            return value.s, value.lineno - value.s.count('\n')
+        return None
+
+    if isinstance(value, ast.Constant) and isinstance(value.value, str):
+        return value.value, value.lineno
+
+    return None
+
+
+def _is_closing_fence(line: str, fence: str) -> bool:
+    stripped = line.strip()
+    return len(stripped) >= len(fence) and set(stripped) == {fence[0]}
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pytest_pyright.cache import (
+    DirectoryBackend,
+    MemoryBackend,
+    PyrightCache,
+    cache_key,
+)
+
+
+def test_memory_backend_stats() -> None:
+    cache = PyrightCache(MemoryBackend())
+    assert cache.get('foo') is None
+
+    cache.set('foo', b'bar')
+    assert cache.get('foo') == b'bar'
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_directory_backend(tmp_path: Path) -> None:
+    backend = DirectoryBackend(tmp_path)
+    assert backend.get('abcdef') is None
+
+    backend.set('abcdef', b'foo')
+    assert backend.get('abcdef') == b'foo'
+    assert (tmp_path / 'ab' / 'abcdef').read_bytes() == b'foo'
+
+    backend.set('abcdef', b'bar')
+    assert backend.get('abcdef') == b'bar'
+    assert [p.name for p in tmp_path.glob('*/*')] == ['abcdef']
+
+
+def test_directory_backend_eviction(tmp_path: Path) -> None:
+    backend = DirectoryBackend(tmp_path, max_size=10)
+    backend.set('aaaa', b'12345')
+    backend.set('bbbb', b'12345')
+    os.utime(tmp_path / 'aa' / 'aaaa', (0, 0))
+    os.utime(tmp_path / 'bb' / 'bbbb', (0, 0))
+
+    # reading an entry marks it as recently used
+    assert backend.get('aaaa') == b'12345'
+
+    backend.set('cccc', b'12345')
+    backend.evict(10)
+    assert backend.get('aaaa') == b'12345'
+    assert backend.get('bbbb') is None
+    assert backend.get('cccc') == b'12345'
+
+
+def test_cache_key(tmp_path: Path) -> None:
+    (tmp_path / 'pyrightconfig.json').write_text('{}')
+    foo = tmp_path / 'foo.py'
+    foo.write_text('import typing\n')
+
+    key = cache_key(foo, tmp_path)
+    assert cache_key(foo, tmp_path) == key
+
+    foo.write_text('import typing\nreveal_type(1)\n')
+    assert cache_key(foo, tmp_path) != key
+
+
+def test_cache_key_local_imports(tmp_path: Path) -> None:
+    (tmp_path / 'pyrightconfig.json').write_text('{}')
+    typesafety = tmp_path / 'typesafety'
+    package = tmp_path / 'src' / 'mypackage'
+    package.mkdir(parents=True)
+    typesafety.mkdir()
+
+    (package / '__init__.py').write_text('from ._core import g\n')
+    (package / '_core.py').write_text('def g() -> int: ...\n')
+    (typesafety / 'helper.py').write_text('def f() -> int: ...\n')
+    (typesafety / 'utils.py').write_text('from .helper import f\n')
+    foo = typesafety / 'foo.py'
+    foo.write_text('from helper import f\nfrom . import utils\nimport mypackage\n')
+
+    def assert_changes(path: Path, content: str) -> None:
+        key = cache_key(foo, tmp_path)
+        path.write_text(content)
+        assert cache_key(foo, tmp_path) != key
+
+    assert_changes(typesafety / 'helper.py', 'def f() -> str: ...\n')
+    assert_changes(typesafety / 'utils.py', 'from .helper import f as h\n')
+    assert_changes(package / '_core.py', 'def g() -> str: ...\n')
+
+
+def test_cache_key_unresolved_import(tmp_path: Path) -> None:
+    (tmp_path / 'pyrightconfig.json').write_text('{}')
+    foo = tmp_path / 'foo.py'
+    foo.write_text('import some_unknown_module\n')
+    other = tmp_path / 'lib' / 'other.py'
+    other.parent.mkdir()
+    other.write_text('a = 1\n')
+
+    key = cache_key(foo, tmp_path)
+    other.write_text('a = "1"\n')
+    assert cache_key(foo, tmp_path) != key
+
+
+def test_cache_key_python_version(tmp_path: Path) -> None:
+    config = tmp_path / 'pyrightconfig.json'
+    config.write_text('{}')
+    foo = tmp_path / 'foo.py'
+    foo.write_text('')
+
+    key = cache_key(foo, tmp_path)
+    config.write_text('{"pythonVersion": "3.7"}')
+    assert cache_key(foo, tmp_path) != key
+
+
+def test_directory_backend_evicts_on_close(tmp_path: Path) -> None:
+    backend = DirectoryBackend(tmp_path, max_size=5)
+    backend.set('aaaa', b'12345')
+    os.utime(tmp_path / 'aa' / 'aaaa', (0, 0))
+    backend.set('bbbb', b'12345')
+    assert len(list(tmp_path.glob('*/*'))) == 2
+
+    backend.close()
+    assert [p.name for p in tmp_path.glob('*/*')] == ['bbbb']
+
+
+def test_cache_key_external_module_changed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    site = tmp_path / 'site'
+    site.mkdir()
+    (site / 'external_package.py').write_text('def f() -> int: ...\n')
+    monkeypatch.syspath_prepend(str(site))
+
+    project = tmp_path / 'project'
+    project.mkdir()
+    foo = project / 'foo.py'
+    foo.write_text('import external_package\n')
+
+    key = cache_key(foo, project)
+    (site / 'external_package.py').write_text('def f() -> str: ...\n')
+    assert cache_key(foo, project) != key
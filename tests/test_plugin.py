@@ -67,6 +67,43 @@ def test_reveal_type_incorrect_comment(pytester: Pytester) -> None:
     )
 
 
+def test_reveal_type_multiple_on_line(pytester: Pytester) -> None:
+    content = '''
+    def foo(a: str, b: int) -> None:
+        reveal_type(a); reveal_type(b)  # T: int
+    '''
+    pytester.makepyfile(**{'typesafety/bar.py': content})
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        ['E | Expected revealed type to be "int" but got "str" instead']
+    )
+
+
+def test_snapshots_multiple_on_line(pytester: Pytester) -> None:
+    content = '''
+    def foo(a: str, b: int) -> None:
+        reveal_type(a); reveal_type(b)
+    '''
+    pytester.makepyfile(**{'typesafety/bar.py': content})
+    result = pytester.runpytest('--pyright-update-snapshots')
+    result.assert_outcomes(passed=1)
+
+    snapshot = json.loads((pytester.path / '.pyright-snapshot.json').read_text())
+    assert snapshot['files']['typesafety/bar.py']['types'] == {'2': ['str', 'int']}
+
+    content = '''
+    def foo(a: str, b: str) -> None:
+        reveal_type(a); reveal_type(b)
+    '''
+    pytester.makepyfile(**{'typesafety/bar.py': content})
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        ['E | Expected revealed type to be "int" but got "str" instead']
+    )
+
+
 def test_reveal_type_missing_comment(pytester: Pytester) -> None:
     content = '''
     def foo(a: str) -> None:
@@ -218,3 +255,266 @@ def test_custom_pyright_directory_commandline_multiple_parts(
         '--pyright-dir=custom_typesafety/pyright', '--collect-only'
     )
     assert result.parseoutcomes() == {'test': 1}
+
+
+def test_cache_dir(pytester: Pytester) -> None:
+    content = '''
+    def foo(a: str) -> None:
+        reveal_type(a)  # T: str
+    '''
+    pytester.makepyfile(**{'typesafety/bar.py': content})
+
+    result = pytester.runpytest('--pyright-cache-dir=.pyright-cache')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*pyright cache*', '0 hits, 1 misses'])
+
+    result = pytester.runpytest('--pyright-cache-dir=.pyright-cache')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*pyright cache*', '1 hits, 0 misses'])
+
+
+def test_cache_custom_backend(pytester: Pytester) -> None:
+    pytester.makeconftest(
+        '''
+        from pytest_pyright.cache import MemoryBackend
+
+        def pytest_pyright_cache_backend(config):
+            return MemoryBackend()
+        '''
+    )
+    pytester.makepyfile(**{'typesafety/bar.py': ''})
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*pyright cache*', '0 hits, 1 misses'])
+
+    result = pytester.runpytest('--pyright-no-cache')
+    result.assert_outcomes(passed=1)
+    assert 'pyright cache' not in result.stdout.str()
+
+
+def test_prefetch(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        **{
+            'typesafety/foo.py': '''
+            def foo(a: str) -> None:
+                reveal_type(a)  # T: str
+            ''',
+            'typesafety/bar.py': '''
+            def bar(a: str) -> None:
+                reveal_type(a)  # T: int
+            ''',
+            'typesafety/baz.py': '',
+        }
+    )
+    result = pytester.runpytest('--pyright-prefetch=2')
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(
+        ['E | Expected revealed type to be "int" but got "str" instead']
+    )
+
+
+def test_docs_snippets(pytester: Pytester) -> None:
+    pytester.makefile(
+        '.md',
+        **{
+            'docs/index': '''
+            # Example
+
+            ```py
+            def foo(a: str) -> None:
+                reveal_type(a)  # T: str
+            ```
+
+            Some text
+
+            ```py
+            def bar(a: str) -> None:
+                reveal_type(a)  # T: int
+            ```
+            '''
+        },
+    )
+    pytester.makepyfile(
+        **{
+            'docs/example.py': '''
+            def foo(a: str) -> None:
+                """
+                >>> def bar(a: str) -> None:
+                ...     reveal_type(a)  # T: str
+                """
+            '''
+        }
+    )
+    result = pytester.runpytest('--pyright-docs-dir=docs', '-v')
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            '*docs/example.py::line-3 PASSED*',
+            '*docs/index.md::line-4 PASSED*',
+            '*docs/index.md::line-11 FAILED*',
+        ]
+    )
+    result.stdout.fnmatch_lines(
+        [
+            '11 | def bar(a: str) -> None:',
+            '12 |     reveal_type(a)  # T: int',
+            'E  | Expected revealed type to be "int" but got "str" instead',
+        ],
+        consecutive=True,
+    )
+
+
+def test_snapshots(pytester: Pytester) -> None:
+    content = '''
+    def foo(a: str) -> None:
+        reveal_type(a)
+    '''
+    pytester.makepyfile(**{'typesafety/bar.py': content})
+
+    result = pytester.runpytest('--pyright-update-snapshots')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['1 snapshots written to *.pyright-snapshot.json'])
+
+    snapshot = json.loads((pytester.path / '.pyright-snapshot.json').read_text())
+    assert snapshot['files']['typesafety/bar.py']['types'] == {'2': ['str']}
+
+    # unchanged files are not analysed again
+    result = pytester.runpytest('--pyright-cache-dir=.pyright-cache')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['0 hits, 0 misses'])
+
+    content = '''
+    def foo(a: int) -> None:
+        reveal_type(a)
+    '''
+    pytester.makepyfile(**{'typesafety/bar.py': content})
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        ['E | Expected revealed type to be "str" but got "int" instead']
+    )
+
+    result = pytester.runpytest('--pyright-update-snapshots')
+    result.assert_outcomes(passed=1)
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+
+
+def test_stats(pytester: Pytester) -> None:
+    pytester.makeconftest(
+        '''
+        def pytest_pyright_stats(item, stats):
+            print(f'stats: {item.name} checked={stats.files_checked}')
+        '''
+    )
+    pytester.makepyfile(**{'typesafety/bar.py': 'import os'})
+    result = pytester.runpytest('--pyright-profile=profile.json', '-s')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(
+        [
+            '*stats: bar.py checked=1*',
+            '*slowest pyright files*',
+            '*typesafety/bar.py::bar.py*',
+        ]
+    )
+
+    profile = json.loads((pytester.path / 'profile.json').read_text())
+    stats = profile['items']['typesafety/bar.py::bar.py']
+    assert stats['files_checked'] == 1
+    assert stats['files_parsed'] >= 1
+    assert {'parse', 'bind', 'check', 'resolve_imports'} <= set(stats['timings'])
+    assert stats['total'] > 0
+
+
+def test_snapshots_local_import_changed(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        **{
+            'typesafety/helper.py': 'def f() -> int: ...',
+            'typesafety/bar.py': '''
+            from helper import f
+
+            reveal_type(f())
+            ''',
+        }
+    )
+    result = pytester.runpytest('--pyright-update-snapshots')
+    result.assert_outcomes(passed=2)
+
+    pytester.makepyfile(**{'typesafety/helper.py': 'def f() -> str: ...'})
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(
+        ['E | Expected revealed type to be "int" but got "str" instead']
+    )
+
+
+def test_snapshots_unsupported_diagnostic(pytester: Pytester) -> None:
+    pytester.makefile(
+        '.json',
+        **{
+            'typesafety/pyrightconfig': json.dumps(
+                {'reportUnnecessaryTypeIgnoreComment': 'information'}
+            )
+        },
+    )
+    pytester.makepyfile(**{'typesafety/bar.py': 'a = 1  # type: ignore'})
+
+    result = pytester.runpytest('--pyright-update-snapshots')
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(['E | Could not extract type from message: *'])
+
+    snapshot = json.loads((pytester.path / '.pyright-snapshot.json').read_text())
+    assert snapshot['files'] == {}
+
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+
+
+def test_stats_prefetch_and_snapshots(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        **{'typesafety/foo.py': 'import os', 'typesafety/bar.py': 'import sys'}
+    )
+    result = pytester.runpytest('--pyright-update-snapshots')
+    result.assert_outcomes(passed=2)
+
+    # files with fresh snapshots are not analysed again
+    pytester.makepyfile(**{'typesafety/bar.py': 'import json'})
+    result = pytester.runpytest(
+        '--pyright-profile=profile.json', '--pyright-prefetch=2'
+    )
+    result.assert_outcomes(passed=2)
+
+    profile = json.loads((pytester.path / 'profile.json').read_text())
+    assert list(profile['items']) == ['typesafety/bar.py::bar.py']
+    assert profile['items']['typesafety/bar.py::bar.py']['files_checked'] == 1
+
+
+def test_pyright_failure_output(pytester: Pytester) -> None:
+    pytester.makefile('.json', **{'typesafety/pyrightconfig': '{"invalid": '})
+    pytester.makepyfile(**{'typesafety/foo.py': '', 'typesafety/bar.py': ''})
+    result = pytester.runpytest('--pyright-prefetch=2')
+    result.assert_outcomes(failed=2)
+    result.stdout.fnmatch_lines(
+        [
+            'E |  An unknown error ocurred while running pyright (exit code *):',
+            '----- pyright std*',
+        ]
+    )
+    assert 'Captured' not in result.stdout.str()
+
+
+def test_stats_cache_hit(pytester: Pytester) -> None:
+    pytester.makepyfile(**{'typesafety/bar.py': 'import os'})
+    args = ('--pyright-cache-dir=.pyright-cache', '--pyright-profile=profile.json')
+
+    result = pytester.runpytest(*args)
+    result.assert_outcomes(passed=1)
+    profile = json.loads((pytester.path / 'profile.json').read_text())
+    assert list(profile['items']) == ['typesafety/bar.py::bar.py']
+
+    # cached results are not analysed again so there are no stats
+    result = pytester.runpytest(*args)
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['1 hits, 0 misses'])
+    profile = json.loads((pytester.path / 'profile.json').read_text())
+    assert profile['items'] == {}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from pytest_pyright.snippets import extract_docstrings, extract_markdown
+
+
+def test_extract_markdown() -> None:
+    content = '''# Title
+
+```py
+from typing import List
+reveal_type([1])  # T: list[int]
+```
+
+```sh
+pip install pytest-pyright
+```
+
+- item
+
+    ```python title="indented.py"
+    a = 1
+    ```
+
+```py
+--8<-- "docs/src/index/types.py"
+```
+
+```pycon
+>>> x = 1
+>>> reveal_type(x)  # T: int
+1
+```
+'''
+    snippets = extract_markdown(content)
+    assert [s.lines for s in snippets] == [
+        ['from typing import List', 'reveal_type([1])  # T: list[int]'],
+        ['a = 1'],
+        ['x = 1', 'reveal_type(x)  # T: int'],
+    ]
+    assert [s.linenos for s in snippets] == [[4, 5], [15], [23, 24]]
+
+
+def test_extract_docstrings() -> None:
+    content = '''"""Module docstring
+
+>>> import os
+"""
+
+
+def foo() -> None:
+    """Example:
+
+        >>> def bar(a: str) -> None:
+        ...     reveal_type(a)  # T: str
+        >>> bar('a')
+    """
+'''
+    snippets = extract_docstrings(content)
+    assert [s.lines for s in snippets] == [
+        ['import os'],
+        ['def bar(a: str) -> None:', '    reveal_type(a)  # T: str', "bar('a')"],
+    ]
+    assert [s.linenos for s in snippets] == [[3], [10, 11, 12]]